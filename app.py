@@ -1,51 +1,148 @@
+import argparse
+import atexit
 import csv
 import sqlite3
-from contextlib import closing
-from datetime import datetime
+import sys
+from contextlib import closing, contextmanager
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 
 DB_PATH = Path(__file__).with_name("inventory.db")
 EXPORT_PATH = Path(__file__).with_name("inventory_export.csv")
 
+SQL_UPSERT_ITEM = """
+    INSERT INTO inventory (item, category, qty, reorder_level)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(item) DO UPDATE SET
+        category=excluded.category,
+        qty=excluded.qty,
+        reorder_level=excluded.reorder_level
+"""
+SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+SQL_NEEDS_RESTOCK = (
+    "needs_restock INTEGER GENERATED ALWAYS AS "
+    "(CASE WHEN qty <= reorder_level THEN 1 ELSE 0 END) VIRTUAL"
+)
+SQL_ITEM_EXISTS = "SELECT 1 FROM inventory WHERE item = ?"
+SQL_LIST_INVENTORY = (
+    "SELECT item, category, qty, reorder_level FROM inventory ORDER BY item"
+)
+
+SCHEMA_VERSION = 3
+OUTPUT_CHUNK_ROWS = 1000
+EXPORT_CHUNK_ROWS = 10_000
+PAGE_SIZE = 50
+# Characters that make csv.writer quote a field (delimiter, quotechar, line breaks).
+CSV_SPECIAL_CHARS = ',"\r\n'
+
+_wal_enabled = False
+_CONN = None
+_search_data_version = None
+
 
 def connect_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    global _wal_enabled
+    conn = sqlite3.connect(DB_PATH, cached_statements=256, isolation_level=None)
+    if not _wal_enabled:
+        # WAL is persisted in the database header, so one switch per process is enough.
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_enabled = True
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA mmap_size=268435456")
     return conn
 
 
+def get_conn():
+    global _CONN
+    if _CONN is None:
+        _CONN = connect_db()
+        atexit.register(_CONN.close)
+    return _CONN
+
+
+@contextmanager
+def _write_transaction(conn):
+    # Take the write lock up front instead of upgrading a deferred transaction.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    _search.cache_clear()
+
+
+def _write_lines(lines, header=()):
+    buf = list(header)
+    for line in lines:
+        buf.append(line)
+        if len(buf) == OUTPUT_CHUNK_ROWS:
+            sys.stdout.write("\n".join(buf) + "\n")
+            buf.clear()
+    if buf:
+        sys.stdout.write("\n".join(buf) + "\n")
+
+
 def create_tables():
-    with connect_db() as conn, closing(conn.cursor()) as c:
+    conn = get_conn()
+    if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        return
+    with _write_transaction(conn), closing(conn.cursor()) as c:
         c.execute(
-            """
+            f"""
             CREATE TABLE IF NOT EXISTS inventory (
                 id INTEGER PRIMARY KEY,
                 item TEXT UNIQUE NOT NULL,
                 category TEXT NOT NULL DEFAULT 'General',
                 qty INTEGER NOT NULL CHECK (qty >= 0),
-                reorder_level INTEGER NOT NULL DEFAULT 5 CHECK (reorder_level >= 0)
+                reorder_level INTEGER NOT NULL DEFAULT 5 CHECK (reorder_level >= 0),
+                {SQL_NEEDS_RESTOCK}
             )
             """
         )
+        columns = {row[1] for row in c.execute("PRAGMA table_xinfo(inventory)")}
+        if "needs_restock" not in columns:
+            c.execute(f"ALTER TABLE inventory ADD COLUMN {SQL_NEEDS_RESTOCK}")
         c.execute(
-            """
+            f"""
             CREATE TABLE IF NOT EXISTS orders (
                 id INTEGER PRIMARY KEY,
                 item_id INTEGER NOT NULL,
                 qty INTEGER NOT NULL CHECK (qty > 0),
                 note TEXT,
-                ordered_at TEXT NOT NULL,
+                ordered_at TEXT NOT NULL DEFAULT ({SQL_NOW}),
                 FOREIGN KEY(item_id) REFERENCES inventory(id)
             )
             """
         )
-        conn.commit()
+        # Substring search can't use an index on lower(item) or lower(category).
+        c.execute("DROP INDEX IF EXISTS idx_inv_lower_item")
+        c.execute("DROP INDEX IF EXISTS idx_inv_lower_category")
+        c.execute("DROP INDEX IF EXISTS idx_inv_lowstock")
+        c.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_restock ON inventory(needs_restock, qty)
+            WHERE needs_restock = 1
+            """
+        )
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS idx_orders_time ON orders(ordered_at DESC, item_id)"
+        )
+        c.execute("ANALYZE")
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
 
-def prompt_int(message, *, minimum=0):
+def prompt_int(message, *, minimum=0, default=None):
     while True:
+        raw = input(message).strip()
+        if not raw and default is not None:
+            return default
         try:
-            value = int(input(message))
+            value = int(raw)
         except ValueError:
             print("Please enter a valid number.")
             continue
@@ -63,60 +160,121 @@ def add_or_update_item():
     category = input("Category (default General): ").strip() or "General"
     qty = prompt_int("Quantity: ", minimum=0)
     reorder_level = prompt_int("Reorder level: ", minimum=0)
-    with connect_db() as conn:
-        conn.execute(
-            """
-            INSERT INTO inventory (item, category, qty, reorder_level)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(item) DO UPDATE SET
-                category=excluded.category,
-                qty=excluded.qty,
-                reorder_level=excluded.reorder_level
-            """,
-            (item, category, qty, reorder_level),
-        )
-        conn.commit()
+    save_item(item, category, qty, reorder_level)
+
+
+def save_item(item, category, qty, reorder_level):
+    conn = get_conn()
+    with _write_transaction(conn):
+        conn.execute(SQL_UPSERT_ITEM, (item, category, qty, reorder_level))
     print(f"Saved '{item}' ({qty} units).")
 
 
-def view_inventory():
-    with connect_db() as conn:
-        rows = conn.execute(
-            "SELECT item, category, qty, reorder_level FROM inventory ORDER BY item"
-        ).fetchall()
-    if not rows:
-        print("Inventory is empty.")
+def bulk_import(rows):
+    conn = get_conn()
+    with _write_transaction(conn):
+        return conn.executemany(SQL_UPSERT_ITEM, rows).rowcount
+
+
+def _csv_item_row(row):
+    # DictReader fills fields missing from a short row with None.
+    item = row.get("item")
+    qty = row.get("qty")
+    if item is None or qty is None:
+        raise ValueError("row needs at least item and qty")
+    item = item.strip()
+    if not item:
+        raise ValueError("item name cannot be empty")
+    return (
+        item,
+        (row.get("category") or "").strip() or "General",
+        int(qty),
+        int(row.get("reorder_level") or 5),
+    )
+
+
+def import_csv(f):
+    reader = csv.DictReader(f)
+    try:
+        imported = bulk_import(_csv_item_row(row) for row in reader)
+    except (ValueError, sqlite3.IntegrityError) as exc:
+        print(f"Import aborted at line {reader.line_num}, nothing saved: {exc}")
         return
-    print(f"\n{'Item':20} {'Category':15} {'Qty':5} {'Reorder @':10}")
-    print("-" * 55)
-    for row in rows:
-        print(
-            f"{row['item'][:20]:20} {row['category'][:15]:15} {row['qty']:5} {row['reorder_level']:10}"
-        )
+    print(f"Imported {imported} rows.")
+
 
+def prompt_page():
+    return prompt_int("Page (default 1): ", minimum=1, default=1)
+
+
+def view_inventory(page=None):
+    if page is None:
+        page = prompt_page()
+    cur = get_conn().execute(
+        f"{SQL_LIST_INVENTORY} LIMIT ? OFFSET ?", (PAGE_SIZE, (page - 1) * PAGE_SIZE)
+    )
+    first = cur.fetchone()
+    if first is None:
+        print("Inventory is empty." if page == 1 else f"Page {page} is empty.")
+        return
+    _write_lines(
+        (
+            f"{item[:20]:20} {category[:15]:15} {qty:5} {reorder_level:10}"
+            for item, category, qty, reorder_level in chain((first,), cur)
+        ),
+        header=(
+            f"\n{'Item':20} {'Category':15} {'Qty':5} {'Reorder @':10}",
+            "-" * 55,
+        ),
+    )
 
-def search_inventory():
-    term = input("Search term: ").strip().lower()
+
+@lru_cache(maxsize=128)
+def _search(term):
+    # Cleared after our own commits (_write_transaction()) and whenever another
+    # connection has committed (_fresh_search()).
+    cur = get_conn().execute(
+        """
+        SELECT item, category, qty, reorder_level
+        FROM inventory
+        WHERE lower(item) LIKE ?1 OR lower(category) LIKE ?1
+        ORDER BY item
+        """,
+        (f"%{term}%",),
+    )
+    return tuple(cur)
+
+
+def _fresh_search(term):
+    global _search_data_version
+    # data_version only moves when a different connection commits, e.g. the CLI.
+    version = get_conn().execute("PRAGMA data_version").fetchone()[0]
+    if version != _search_data_version:
+        _search.cache_clear()
+        _search_data_version = version
+    return _search(term)
+
+
+def search_inventory(term=None):
+    if term is None:
+        term = input("Search term: ")
+    term = term.strip().lower()
     if not term:
         print("Nothing to search.")
         return
-    with connect_db() as conn:
-        rows = conn.execute(
-            """
-            SELECT item, category, qty, reorder_level
-            FROM inventory
-            WHERE lower(item) LIKE ? OR lower(category) LIKE ?
-            ORDER BY item
-            """,
-            (f"%{term}%", f"%{term}%"),
-        ).fetchall()
+    rows = _fresh_search(term)
     if not rows:
         print("No matching items found.")
         return
-    for row in rows:
-        print(
-            f"{row['item']} ({row['category']}) - {row['qty']} units (reorder @ {row['reorder_level']})"
-        )
+    _write_lines(
+        f"{item} ({category}) - {qty} units (reorder @ {reorder_level})"
+        for item, category, qty, reorder_level in rows
+    )
+
+
+def _item_exists(conn, item):
+    row = conn.execute(SQL_ITEM_EXISTS, (item,)).fetchone()
+    return row is not None
 
 
 def adjust_quantity():
@@ -124,138 +282,269 @@ def adjust_quantity():
     delta = prompt_int("Adjustment amount (use positive numbers): ", minimum=0)
     direction = input("Add or subtract (a/s): ").strip().lower() or "a"
     multiplier = 1 if direction.startswith("a") else -1
-    with connect_db() as conn:
+    apply_adjustment(item, multiplier * delta)
+
+
+def apply_adjustment(item, change):
+    conn = get_conn()
+    with _write_transaction(conn):
         row = conn.execute(
-            "SELECT id, qty FROM inventory WHERE item = ?", (item,)
+            """
+            UPDATE inventory SET qty = qty + ?1
+            WHERE item = ?2 AND qty + ?1 >= 0
+            RETURNING qty
+            """,
+            (change, item),
         ).fetchone()
         if not row:
-            print("Item not found.")
+            if _item_exists(conn, item):
+                print("Cannot reduce below zero.")
+            else:
+                print("Item not found.")
             return
-        new_qty = row["qty"] + multiplier * delta
-        if new_qty < 0:
-            print("Cannot reduce below zero.")
-            return
-        conn.execute("UPDATE inventory SET qty = ? WHERE id = ?", (new_qty, row["id"]))
-        conn.commit()
-    print(f"{item} now has {new_qty} units.")
+    print(f"{item} now has {row[0]} units.")
 
 
 def place_order():
     item = input("Item to order: ").strip()
     qty = prompt_int("Quantity: ", minimum=1)
     note = input("Note (optional): ").strip() or None
-    with connect_db() as conn:
+    record_order(item, qty, note)
+
+
+def record_order(item, qty, note=None):
+    conn = get_conn()
+    with _write_transaction(conn):
         row = conn.execute(
-            "SELECT id, qty FROM inventory WHERE item = ?", (item,)
+            """
+            UPDATE inventory SET qty = qty - ?1
+            WHERE item = ?2 AND qty >= ?1
+            RETURNING id
+            """,
+            (qty, item),
         ).fetchone()
         if not row:
-            print("Item not found.")
-            return
-        if row["qty"] < qty:
-            print("Not enough stock for this order.")
+            if _item_exists(conn, item):
+                print("Not enough stock for this order.")
+            else:
+                print("Item not found.")
             return
+        # Stamped by SQLite; spelled out so databases created before the
+        # column default existed keep working.
         conn.execute(
-            "UPDATE inventory SET qty = qty - ? WHERE id = ?", (qty, row["id"])
+            f"INSERT INTO orders (item_id, qty, note, ordered_at) VALUES (?, ?, ?, {SQL_NOW})",
+            (row[0], qty, note),
         )
-        conn.execute(
-            "INSERT INTO orders (item_id, qty, note, ordered_at) VALUES (?, ?, ?, ?)",
-            (row["id"], qty, note, datetime.utcnow().isoformat()),
-        )
-        conn.commit()
     print(f"Order recorded for {qty} units of {item}.")
 
 
-def view_orders():
-    with connect_db() as conn:
-        rows = conn.execute(
-            """
-            SELECT o.id, i.item, o.qty, o.note, o.ordered_at
-            FROM orders o
-            JOIN inventory i ON o.item_id = i.id
-            ORDER BY o.ordered_at DESC
-            """
-        ).fetchall()
-    if not rows:
-        print("No orders recorded.")
+def view_orders(page=None):
+    if page is None:
+        page = prompt_page()
+    cur = get_conn().execute(
+        """
+        SELECT o.id, i.item, o.qty, o.note, o.ordered_at
+        FROM orders o
+        JOIN inventory i ON o.item_id = i.id
+        ORDER BY o.ordered_at DESC
+        LIMIT ? OFFSET ?
+        """,
+        (PAGE_SIZE, (page - 1) * PAGE_SIZE),
+    )
+    first = cur.fetchone()
+    if first is None:
+        print("No orders recorded." if page == 1 else f"Page {page} is empty.")
         return
-    for row in rows:
-        note = f" ({row['note']})" if row["note"] else ""
-        print(f"{row['ordered_at']}: #{row['id']} {row['item']} x{row['qty']}{note}")
+    _write_lines(
+        f"{ordered_at}: #{order_id} {item} x{qty}{f' ({note})' if note else ''}"
+        for order_id, item, qty, note, ordered_at in chain((first,), cur)
+    )
 
 
 def view_low_stock():
-    with connect_db() as conn:
-        rows = conn.execute(
-            """
-            SELECT item, qty, reorder_level
-            FROM inventory
-            WHERE qty <= reorder_level
-            ORDER BY qty
-            """
-        ).fetchall()
+    rows = get_conn().execute(
+        """
+        SELECT item, qty, reorder_level
+        FROM inventory
+        WHERE needs_restock = 1
+        ORDER BY qty
+        """
+    ).fetchall()
     if not rows:
         print("No items at or below reorder level.")
         return
-    print("Items needing restock:")
-    for row in rows:
-        print(f"- {row['item']}: {row['qty']} (reorder @ {row['reorder_level']})")
+    _write_lines(
+        (
+            f"- {item}: {qty} (reorder @ {reorder_level})"
+            for item, qty, reorder_level in rows
+        ),
+        header=("Items needing restock:",),
+    )
 
 
 def export_inventory():
-    with connect_db() as conn:
-        rows = conn.execute(
-            "SELECT item, category, qty, reorder_level FROM inventory ORDER BY item"
-        ).fetchall()
-    if not rows:
+    cur = get_conn().execute(SQL_LIST_INVENTORY)
+    chunk = cur.fetchmany(EXPORT_CHUNK_ROWS)
+    if not chunk:
         print("Inventory empty, nothing to export.")
         return
-    with EXPORT_PATH.open("w", newline="") as f:
+    exported = 0
+    with EXPORT_PATH.open("w", newline="", buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(["item", "category", "qty", "reorder_level"])
-        writer.writerows(
-            (row["item"], row["category"], row["qty"], row["reorder_level"])
-            for row in rows
-        )
-    print(f"Exported {len(rows)} rows to {EXPORT_PATH.name}.")
+        while chunk:
+            text = "".join(
+                chain.from_iterable((item, category) for item, category, _, _ in chunk)
+            )
+            if any(ch in text for ch in CSV_SPECIAL_CHARS):
+                writer.writerows(chunk)
+            else:
+                # Nothing to quote, so skip csv.writer and format the lines directly.
+                f.write(
+                    "".join(
+                        f"{item},{category},{qty},{reorder_level}\r\n"
+                        for item, category, qty, reorder_level in chunk
+                    )
+                )
+            exported += len(chunk)
+            chunk = cur.fetchmany(EXPORT_CHUNK_ROWS)
+    print(f"Exported {exported} rows to {EXPORT_PATH.name}.")
 
 
 def inventory_summary():
-    with connect_db() as conn:
-        totals = conn.execute(
-            "SELECT COUNT(*), COALESCE(SUM(qty), 0) FROM inventory"
-        ).fetchone()
-        per_category = conn.execute(
-            """
-            SELECT category, COUNT(*) items, COALESCE(SUM(qty), 0) qty
-            FROM inventory
-            GROUP BY category
-            ORDER BY qty DESC
-            """
-        ).fetchall()
+    per_category = get_conn().execute(
+        """
+        SELECT category, COUNT(*) items, COALESCE(SUM(qty), 0) qty
+        FROM inventory
+        GROUP BY category
+        ORDER BY qty DESC
+        """
+    ).fetchall()
+    # Every item has a category, so the grand totals fall out of the same scan.
     print("=== Snapshot ===")
-    print(f"Items tracked: {totals[0]}")
-    print(f"Units on hand: {totals[1]}")
+    print(f"Items tracked: {sum(items for _, items, _ in per_category)}")
+    print(f"Units on hand: {sum(qty for _, _, qty in per_category)}")
     if per_category:
         print("Per category:")
-        for row in per_category:
-            print(f"- {row['category']}: {row['qty']} units across {row['items']} items")
+        for category, items, qty in per_category:
+            print(f"- {category}: {qty} units across {items} items")
     else:
         print("No category data yet.")
 
 
 def delete_item():
     item = input("Item to delete: ").strip()
-    with connect_db() as conn:
+    remove_item(item)
+
+
+def remove_item(item):
+    conn = get_conn()
+    with _write_transaction(conn):
         deleted = conn.execute("DELETE FROM inventory WHERE item = ?", (item,)).rowcount
-        conn.commit()
     if deleted:
         print(f"Deleted {item}. Related order history remains for auditing.")
     else:
         print("Item not found.")
 
 
-def main():
+def _int_at_least(minimum):
+    def parse(value):
+        number = int(value)
+        if number < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}")
+        return number
+
+    return parse
+
+
+def _item_name(value):
+    value = value.strip()
+    if not value:
+        raise argparse.ArgumentTypeError("cannot be empty")
+    return value
+
+
+def _category_name(value):
+    return value.strip() or "General"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Inventory tracker. Run without a command for the interactive menu."
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    add = commands.add_parser("add", help="add or update an item")
+    add.add_argument("--item", type=_item_name, required=True)
+    add.add_argument("--category", type=_category_name, default="General")
+    add.add_argument("--qty", type=_int_at_least(0), required=True)
+    add.add_argument("--reorder-level", type=_int_at_least(0), default=5)
+
+    imp = commands.add_parser(
+        "import", help="upsert items from CSV (item,category,qty,reorder_level)"
+    )
+    imp.add_argument("file", nargs="?", type=argparse.FileType("r"), default=sys.stdin)
+
+    view = commands.add_parser("view", help="view inventory")
+    view.add_argument("--page", type=_int_at_least(1), default=1)
+
+    search = commands.add_parser("search", help="search inventory")
+    search.add_argument("term")
+
+    adjust = commands.add_parser("adjust", help="adjust quantity")
+    adjust.add_argument("--item", type=_item_name, required=True)
+    adjust.add_argument("--delta", type=int, required=True, help="negative to subtract")
+
+    order = commands.add_parser("order", help="record customer order")
+    order.add_argument("--item", type=_item_name, required=True)
+    order.add_argument("--qty", type=_int_at_least(1), required=True)
+    order.add_argument("--note")
+
+    orders = commands.add_parser("orders", help="view order history")
+    orders.add_argument("--page", type=_int_at_least(1), default=1)
+
+    commands.add_parser("low-stock", help="view low-stock items")
+
+    delete = commands.add_parser("delete", help="delete item")
+    delete.add_argument("--item", type=_item_name, required=True)
+
+    commands.add_parser("export", help="export inventory to CSV")
+    commands.add_parser("summary", help="snapshot summary")
+    return parser
+
+
+def run_command(args):
+    if args.command == "add":
+        save_item(args.item, args.category, args.qty, args.reorder_level)
+    elif args.command == "import":
+        with args.file:
+            import_csv(args.file)
+    elif args.command == "view":
+        view_inventory(args.page)
+    elif args.command == "search":
+        search_inventory(args.term)
+    elif args.command == "adjust":
+        apply_adjustment(args.item, args.delta)
+    elif args.command == "order":
+        record_order(args.item, args.qty, args.note)
+    elif args.command == "orders":
+        view_orders(args.page)
+    elif args.command == "low-stock":
+        view_low_stock()
+    elif args.command == "delete":
+        remove_item(args.item)
+    elif args.command == "export":
+        export_inventory()
+    elif args.command == "summary":
+        inventory_summary()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
     create_tables()
+    if args.command:
+        run_command(args)
+        return
     menu_options = {
         "1": ("Add or update item", add_or_update_item),
         "2": ("View inventory", view_inventory),
@@ -269,16 +558,17 @@ def main():
         "10": ("Snapshot summary", inventory_summary),
         "11": ("Exit", None),
     }
+    menu_text = "\nInventory Tracker\n" + "\n".join(
+        f"{key}. {label}" for key, (label, _) in menu_options.items()
+    )
+    handlers = {key: func for key, (_, func) in menu_options.items() if func}
     while True:
-        print("\nInventory Tracker")
-        for key, (label, _) in menu_options.items():
-            print(f"{key}. {label}")
+        print(menu_text)
         choice = input("Choose: ").strip()
         if choice == "11":
             break
-        action = menu_options.get(choice)
-        if action:
-            _, func = action
+        func = handlers.get(choice)
+        if func:
             func()
         else:
             print("Unknown option.")